@@ -1,14 +1,20 @@
 import re
+import time
 from collections.abc import Sequence
 from pathlib import Path
+from typing import cast
 
 from qtpy.QtCore import QObject, QSortFilterProxyModel, Qt, QThread, Signal
+from qtpy.QtGui import QStandardItemModel
 from qtpy.QtWidgets import (
+    QCheckBox,
+    QComboBox,
     QFileDialog,
     QHBoxLayout,
     QLabel,
     QLineEdit,
     QMainWindow,
+    QMessageBox,
     QProgressBar,
     QPushButton,
     QSpinBox,
@@ -17,14 +23,58 @@ from qtpy.QtWidgets import (
     QWidget,
 )
 
-from .models import Image
-from .utils import write_archive
+from .models import ArchiveEstimate, Deduplication, Image
+from .utils import (
+    estimate_archive,
+    find_duplicates,
+    has_unique_arcnames,
+    is_manifest_format_available,
+    reader_cache,
+    write_archive,
+)
 from .widgets import ConsensusImageList, ImageTableModel, ImageTableView
 
 
 class MainWindow(QMainWindow):
+    class ArchiveEstimatorThread(QThread):
+        completed = Signal(ArchiveEstimate)
+        error = Signal(Exception)
+
+        def __init__(
+            self,
+            archive_file: str | Path,
+            images: Sequence[Image],
+            ome_tiff: bool = False,
+            compresslevel: int = 5,
+            checksums: bool = True,
+            split_scenes: bool = True,
+            parent: QObject | None = None,
+        ) -> None:
+            super().__init__(parent)
+            self._archive_file = archive_file
+            self._images = images
+            self._ome_tiff = ome_tiff
+            self._compresslevel = compresslevel
+            self._checksums = checksums
+            self._split_scenes = split_scenes
+
+        def run(self) -> None:
+            try:
+                estimate = estimate_archive(
+                    self._images,
+                    archive_file=self._archive_file,
+                    ome_tiff=self._ome_tiff,
+                    compresslevel=self._compresslevel,
+                    checksums=self._checksums,
+                    split_scenes=self._split_scenes,
+                )
+                self.completed.emit(estimate)
+            except Exception as e:
+                self.error.emit(e)
+
     class ArchiveWriterThread(QThread):
         step = Signal(int, Image)
+        deduplicated = Signal(Deduplication, float)
         completed = Signal()
         error = Signal(Exception)
 
@@ -34,6 +84,10 @@ class MainWindow(QMainWindow):
             images: Sequence[Image],
             ome_tiff: bool = False,
             compresslevel: int = 5,
+            deduplicate: bool = False,
+            manifest_formats: Sequence[str] = ("csv",),
+            checksums: bool = True,
+            split_scenes: bool = True,
             parent: QObject | None = None,
         ) -> None:
             super().__init__(parent)
@@ -41,23 +95,44 @@ class MainWindow(QMainWindow):
             self._images = images
             self._ome_tiff = ome_tiff
             self._compresslevel = compresslevel
+            self._deduplicate = deduplicate
+            self._manifest_formats = manifest_formats
+            self._checksums = checksums
+            self._split_scenes = split_scenes
 
         def run(self) -> None:
             try:
+                dedup = find_duplicates(self._images) if self._deduplicate else None
+                start_time = time.perf_counter()
                 archive_writer = write_archive(
                     self._archive_file,
                     self._images,
                     ome_tiff=self._ome_tiff,
                     compresslevel=self._compresslevel,
+                    duplicates=dedup.duplicates if dedup is not None else None,
+                    manifest_formats=self._manifest_formats,
+                    checksums=self._checksums,
+                    split_scenes=self._split_scenes,
                 )
                 for i, img in enumerate(archive_writer):
                     self.step.emit(i, img)
+                if dedup is not None:
+                    # extrapolate from the observed throughput of non-duplicates
+                    archive_time = time.perf_counter() - start_time
+                    n_bytes_archived = dedup.n_bytes_total - dedup.n_bytes_saved
+                    time_saved = -dedup.hashing_time
+                    if n_bytes_archived > 0:
+                        time_saved += (
+                            archive_time * dedup.n_bytes_saved / n_bytes_archived
+                        )
+                    self.deduplicated.emit(dedup, time_saved)
                 self.completed.emit()
             except Exception as e:
                 self.error.emit(e)
 
     def __init__(self, parent: QWidget | None = None) -> None:
         super().__init__(parent)
+        self._archive_estimator_thread: MainWindow.ArchiveEstimatorThread | None = None
         self._archive_writer_thread: MainWindow.ArchiveWriterThread | None = None
         central_widget = QWidget()
         central_widget_layout = QVBoxLayout()
@@ -95,12 +170,50 @@ class MainWindow(QMainWindow):
         actions_widget = QWidget()
         actions_widget_layout = QHBoxLayout()
         actions_widget_layout.setAlignment(Qt.AlignmentFlag.AlignRight)
-        self._compresslevel_label = QLabel("Compression level (1=fastest, 9=smallest):")
+        self._compresslevel_label = QLabel(
+            "Compression level (0=none, 1=fastest, 9=smallest):"
+        )
         actions_widget_layout.addWidget(self._compresslevel_label)
         self._compresslevel_spin_box = QSpinBox()
-        self._compresslevel_spin_box.setRange(1, 9)
+        self._compresslevel_spin_box.setRange(0, 9)
         self._compresslevel_spin_box.setValue(5)
         actions_widget_layout.addWidget(self._compresslevel_spin_box)
+        self._deduplicate_check_box = QCheckBox("Deduplicate identical files")
+        actions_widget_layout.addWidget(self._deduplicate_check_box)
+        self._checksums_check_box = QCheckBox("Checksums (SHA-256)")
+        self._checksums_check_box.setToolTip(
+            "Without checksums, uncompressed archives are written using fast kernel"
+            " copies"
+        )
+        self._checksums_check_box.setChecked(True)
+        actions_widget_layout.addWidget(self._checksums_check_box)
+        self._split_scenes_check_box = QCheckBox("Convert scenes separately")
+        self._split_scenes_check_box.setToolTip(
+            "Scenes of multi-scene images are converted in parallel and archived as"
+            " separate OME-TIFF files"
+        )
+        self._split_scenes_check_box.setChecked(True)
+        self._split_scenes_check_box.toggled.connect(
+            self._on_split_scenes_check_box_toggled
+        )
+        actions_widget_layout.addWidget(self._split_scenes_check_box)
+        self._manifest_format_label = QLabel("Metadata format:")
+        actions_widget_layout.addWidget(self._manifest_format_label)
+        self._manifest_format_combo_box = QComboBox()
+        self._manifest_format_combo_box.addItem("CSV", ("csv",))
+        self._manifest_format_combo_box.addItem("Parquet", ("parquet",))
+        self._manifest_format_combo_box.addItem("CSV + Parquet", ("csv", "parquet"))
+        # QComboBox uses a QStandardItemModel by default
+        manifest_format_model = cast(
+            QStandardItemModel, self._manifest_format_combo_box.model()
+        )
+        for index in range(self._manifest_format_combo_box.count()):
+            if not all(
+                is_manifest_format_available(manifest_format)
+                for manifest_format in self._manifest_format_combo_box.itemData(index)
+            ):
+                manifest_format_model.item(index).setEnabled(False)
+        actions_widget_layout.addWidget(self._manifest_format_combo_box)
         actions_widget_layout.addStretch()
         self._convert_and_archive_button = QPushButton("Convert to OME-TIFF && archive")
         self._convert_and_archive_button.clicked.connect(
@@ -137,13 +250,19 @@ class MainWindow(QMainWindow):
             self._regex_line_edit.setStyleSheet("background-color: white")
         self._image_table_model.set_posix_path_pattern(posix_path_pattern)
 
+    def _on_split_scenes_check_box_toggled(self, checked: bool) -> None:
+        self._image_table_model.set_split_scenes(checked)
+        self._update_button_states()
+
     def _on_remove_selected_rows_button_clicked(self) -> None:
         for index in sorted(
             self._image_table_view.selectionModel().selectedRows(),
             key=lambda index: index.row(),
             reverse=True,
         ):
-            self._images.pop(index.row())
+            img = self._images.pop(index.row())
+            if all(other_img.orig_path != img.orig_path for other_img in self._images):
+                reader_cache.evict(img.orig_path)
 
     def _on_convert_and_archive_button_clicked(self) -> None:
         self._create_archive(ome_tiff=True)
@@ -152,57 +271,160 @@ class MainWindow(QMainWindow):
         self._create_archive()
 
     def _create_archive(self, ome_tiff: bool = False) -> None:
+        if self._compresslevel_spin_box.value() > 0:
+            archive_filter = "Image archive (*.tar.gz)"
+        else:
+            archive_filter = "Image archive (*.tar)"
         archive_file, selected_filter = QFileDialog.getSaveFileName(
             parent=self,
             dir=str(Path.home() / "Untitled"),
-            filter="Image archive (*.tar.gz)",
-            selectedFilter="Image archive (*.tar.gz)",
+            filter=archive_filter,
+            selectedFilter=archive_filter,
         )
         if archive_file:
-            self._archive_writer_thread = MainWindow.ArchiveWriterThread(
+            compresslevel = self._compresslevel_spin_box.value()
+            deduplicate = self._deduplicate_check_box.isChecked()
+            manifest_formats = self._manifest_format_combo_box.currentData()
+            checksums = self._checksums_check_box.isChecked()
+            split_scenes = self._split_scenes_check_box.isChecked()
+            self._archive_estimator_thread = MainWindow.ArchiveEstimatorThread(
                 archive_file,
                 self._images,
                 ome_tiff=ome_tiff,
-                compresslevel=self._compresslevel_spin_box.value(),
+                compresslevel=compresslevel,
+                checksums=checksums,
+                split_scenes=split_scenes,
             )
             self._update_button_states()
 
-            @self._archive_writer_thread.step.connect
-            def on_archive_writer_thread_step(i, img):
-                self._progress_bar.setValue(i + 1)
+            def confirm_and_write_archive(text):
+                if (
+                    QMessageBox.question(self, "Archive images", text)
+                    == QMessageBox.StandardButton.Yes
+                ):
+                    self._write_archive(
+                        archive_file,
+                        ome_tiff=ome_tiff,
+                        compresslevel=compresslevel,
+                        deduplicate=deduplicate,
+                        manifest_formats=manifest_formats,
+                        checksums=checksums,
+                        split_scenes=split_scenes,
+                    )
+                else:
+                    self._status_bar.showMessage("Ready")
 
-            @self._archive_writer_thread.completed.connect
-            def on_archive_writer_thread_completed():
-                self._status_bar.showMessage("Images archived")
+            @self._archive_estimator_thread.completed.connect
+            def on_archive_estimator_thread_completed(estimate):
                 self._progress_bar.setHidden(True)
-                self._archive_writer_thread = None
+                self._archive_estimator_thread = None
                 self._update_button_states()
+                minutes, seconds = divmod(round(estimate.duration), 60)
+                hours, minutes = divmod(minutes, 60)
+                text = (
+                    "Estimated archive size: "
+                    f"{estimate.n_bytes_output / 1024**3:.2f} GiB\n"
+                    f"Estimated duration: {hours}:{minutes:02d}:{seconds:02d}\n"
+                )
+                if estimate.n_bytes_free is not None:
+                    text += (
+                        f"Free disk space: {estimate.n_bytes_free / 1024**3:.2f} GiB\n"
+                    )
+                if estimate.fits_on_disk is False:
+                    text += "\nThe archive may not fit on the target disk!\n"
+                text += "\nDo you want to proceed?"
+                confirm_and_write_archive(text)
 
-            @self._archive_writer_thread.error.connect
-            def on_archive_writer_thread_error(e):
-                self._status_bar.showMessage(f"Error: {e}")
+            @self._archive_estimator_thread.error.connect
+            def on_archive_estimator_thread_error(e):
                 self._progress_bar.setHidden(True)
-                self._archive_writer_thread = None
+                self._archive_estimator_thread = None
                 self._update_button_states()
+                confirm_and_write_archive(
+                    f"The archive size and duration could not be estimated: {e}\n"
+                    "\nDo you want to proceed without an estimate?"
+                )
 
-            self._status_bar.showMessage("Archiving images...")
-            self._progress_bar.setMaximum(len(self._images))
+            self._status_bar.showMessage("Estimating archive size and duration...")
+            self._progress_bar.setMaximum(0)
             self._progress_bar.setHidden(False)
-            self._progress_bar.setValue(0)
-            self._archive_writer_thread.start()
+            self._archive_estimator_thread.start()
+
+    def _write_archive(
+        self,
+        archive_file: str,
+        ome_tiff: bool = False,
+        compresslevel: int = 5,
+        deduplicate: bool = False,
+        manifest_formats: Sequence[str] = ("csv",),
+        checksums: bool = True,
+        split_scenes: bool = True,
+    ) -> None:
+        self._archive_writer_thread = MainWindow.ArchiveWriterThread(
+            archive_file,
+            self._images,
+            ome_tiff=ome_tiff,
+            compresslevel=compresslevel,
+            deduplicate=deduplicate,
+            manifest_formats=manifest_formats,
+            checksums=checksums,
+            split_scenes=split_scenes,
+        )
+        self._update_button_states()
+        completed_message = "Images archived"
+
+        @self._archive_writer_thread.step.connect
+        def on_archive_writer_thread_step(i, img):
+            self._progress_bar.setValue(i + 1)
+
+        @self._archive_writer_thread.deduplicated.connect
+        def on_archive_writer_thread_deduplicated(dedup, time_saved):
+            nonlocal completed_message
+            completed_message += (
+                f" ({len(dedup.duplicates)} duplicate files,"
+                f" {dedup.n_bytes_saved / 1024**2:.1f} MiB"
+                f" and approx. {time_saved:.1f} s saved)"
+            )
+
+        @self._archive_writer_thread.completed.connect
+        def on_archive_writer_thread_completed():
+            self._status_bar.showMessage(completed_message)
+            self._progress_bar.setHidden(True)
+            self._archive_writer_thread = None
+            self._update_button_states()
+
+        @self._archive_writer_thread.error.connect
+        def on_archive_writer_thread_error(e):
+            self._status_bar.showMessage(f"Error: {e}")
+            self._progress_bar.setHidden(True)
+            self._archive_writer_thread = None
+            self._update_button_states()
+
+        self._status_bar.showMessage("Archiving images...")
+        self._progress_bar.setMaximum(len(self._images))
+        self._progress_bar.setHidden(False)
+        self._progress_bar.setValue(0)
+        self._archive_writer_thread.start()
 
     def _update_button_states(self) -> None:
         self._remove_selected_rows_button.setEnabled(
-            self._archive_writer_thread is None
+            self._archive_estimator_thread is None
+            and self._archive_writer_thread is None
             and self._image_table_view.selectionModel().hasSelection()
         )
         self._convert_and_archive_button.setEnabled(
-            self._archive_writer_thread is None
+            self._archive_estimator_thread is None
+            and self._archive_writer_thread is None
             and len(self._images) > 0
-            and len(set(img.posix_path for img in self._images)) == len(self._images)
+            and has_unique_arcnames(
+                self._images,
+                ome_tiff=True,
+                split_scenes=self._split_scenes_check_box.isChecked(),
+            )
         )
         self._archive_only_button.setEnabled(
-            self._archive_writer_thread is None
+            self._archive_estimator_thread is None
+            and self._archive_writer_thread is None
             and len(self._images) > 0
-            and len(set(img.posix_path for img in self._images)) == len(self._images)
+            and has_unique_arcnames(self._images)
         )
@@ -1,12 +1,9 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
-class Image:
-    orig_path: str
-    posix_path: str
+class ImageMetadata:
     dtype: str
-    n_scenes: int
     n_timepoints: int
     n_channels: int
     size_z_px: int
@@ -37,3 +34,57 @@ class Image:
     @property
     def pixel_size_z_str(self) -> str | None:
         return f"{self.pixel_size_z:.6f}" if self.pixel_size_z is not None else None
+
+
+@dataclass
+class Scene(ImageMetadata):
+    scene_id: str
+
+
+@dataclass
+class Image(ImageMetadata):
+    orig_path: str
+    posix_path: str
+    n_scenes: int
+    scenes: list[Scene] = field(default_factory=list)
+    scene_errors: dict[str, str] = field(default_factory=dict)
+
+    @property
+    def has_consistent_scenes(self) -> bool:
+        return not self.scene_errors and all(
+            scene.dtype == self.dtype
+            and scene.is_timeseries == self.is_timeseries
+            and scene.is_zstack == self.is_zstack
+            and scene.n_channels == self.n_channels
+            and scene.dimension_order == self.dimension_order
+            and scene.pixel_size_x_str == self.pixel_size_x_str
+            and scene.pixel_size_y_str == self.pixel_size_y_str
+            and scene.pixel_size_z_str == self.pixel_size_z_str
+            and scene.channel_names == self.channel_names
+            for scene in self.scenes
+        )
+
+
+@dataclass
+class Deduplication:
+    duplicates: dict[str, str]
+    n_bytes_total: int
+    n_bytes_saved: int
+    hashing_time: float
+
+
+@dataclass
+class ArchiveEstimate:
+    n_bytes_input: int
+    n_bytes_output: int
+    duration: float
+    compression_ratio: float
+    read_throughput: float | None
+    conversion_throughput: float | None
+    n_bytes_free: int | None
+
+    @property
+    def fits_on_disk(self) -> bool | None:
+        if self.n_bytes_free is None:
+            return None
+        return self.n_bytes_output <= self.n_bytes_free
@@ -1,46 +1,265 @@
+import csv
+import errno
+import hashlib
+import importlib.util
+import os
+import queue
+import random
+import shutil
+import sys
 import tarfile
-from collections.abc import Generator, Sequence
-from io import BytesIO
-from pathlib import Path
-from tarfile import TarInfo
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import Callable, Generator, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import (
+    AbstractContextManager,
+    ExitStack,
+    closing,
+    contextmanager,
+    nullcontext,
+)
+from dataclasses import dataclass
+from functools import partial
+from io import BufferedWriter
+from pathlib import Path, PurePosixPath
+from tarfile import TarFile, TarInfo
 from tempfile import TemporaryDirectory
+from typing import Any, BinaryIO, TypeVar
 
-import pandas as pd
 from aicsimageio import AICSImage
 from aicsimageio.exceptions import UnsupportedFileFormatError
+from aicsimageio.readers.reader import Reader
 
-from .models import Image
+from .models import ArchiveEstimate, Deduplication, Image, ImageMetadata, Scene
 
+# sendfile only supports regular files as output on Linux
+_KERNEL_COPY = sys.platform.startswith("linux") and hasattr(os, "sendfile")
 
-def load_images(path: str | Path, _base_path: Path | None = None) -> Sequence[Image]:
+_T = TypeVar("_T")
+
+
+class ReaderCache:
+    @dataclass(frozen=True)
+    class Info:
+        hits: int
+        misses: int
+        reader_hits: int
+        reader_misses: int
+        size: int
+
+    @dataclass
+    class _Entry:
+        aics_img: AICSImage
+        lock: threading.Lock
+
+    def __init__(
+        self,
+        max_size: int = 16,
+        max_readers: int = 4096,
+    ) -> None:
+        self.max_size = max_size
+        self.max_readers = max_readers
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[str, int], ReaderCache._Entry] = OrderedDict()
+        self._readers: OrderedDict[tuple[str, int], type[Reader]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._reader_hits = 0
+        self._reader_misses = 0
+
+    @contextmanager
+    def open(self, path: str | Path) -> Generator[AICSImage, None, None]:
+        key = self._get_key(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            else:
+                self._misses += 1
+        if entry is None:
+            aics_img = AICSImage(path, reader=self._get_reader(key))
+            entry = ReaderCache._Entry(aics_img=aics_img, lock=threading.Lock())
+            with self._lock:
+                self._put_reader(key, type(aics_img.reader))
+                # another thread may have opened the same image in the meantime
+                entry = self._entries.setdefault(key, entry)
+                self._entries.move_to_end(key)
+                self._evict()
+        with entry.lock:
+            if entry.aics_img.current_scene_index != 0:
+                entry.aics_img.set_scene(0)
+            yield entry.aics_img
+
+    def determine_reader(self, path: str | Path) -> type[Reader]:
+        key = self._get_key(path)
+        reader = self._get_reader(key)
+        if reader is None:
+            reader = AICSImage.determine_reader(path)
+            with self._lock:
+                self._put_reader(key, reader)
+        return reader
+
+    def cache_info(self) -> "ReaderCache.Info":
+        with self._lock:
+            return ReaderCache.Info(
+                hits=self._hits,
+                misses=self._misses,
+                reader_hits=self._reader_hits,
+                reader_misses=self._reader_misses,
+                size=len(self._entries),
+            )
+
+    def evict(self, path: str | Path) -> None:
+        path = str(Path(path).absolute())
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._readers.clear()
+
+    def _get_key(self, path: str | Path) -> tuple[str, int]:
+        path = Path(path).absolute()
+        return str(path), path.stat().st_mtime_ns
+
+    def _get_reader(self, key: tuple[str, int]) -> type[Reader] | None:
+        with self._lock:
+            reader = self._readers.get(key)
+            if reader is not None:
+                self._readers.move_to_end(key)
+                self._reader_hits += 1
+            else:
+                self._reader_misses += 1
+            return reader
+
+    def _put_reader(self, key: tuple[str, int], reader: type[Reader]) -> None:
+        self._readers[key] = reader
+        self._readers.move_to_end(key)
+        while len(self._readers) > self.max_readers:
+            self._readers.popitem(last=False)
+
+    def _evict(self) -> None:
+        # the memory footprint of readers (file handles, parsed metadata) cannot be
+        # determined reliably, so the number of cached readers is bounded instead
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+reader_cache = ReaderCache()
+
+
+def _get_scene(aics_img: AICSImage) -> Scene:
+    return Scene(
+        scene_id=aics_img.current_scene,
+        n_timepoints=aics_img.dims.T if "T" in aics_img.dims.order else 1,
+        n_channels=aics_img.dims.C if "C" in aics_img.dims.order else 1,
+        size_z_px=aics_img.dims.Z if "Z" in aics_img.dims.order else 1,
+        size_y_px=aics_img.dims.Y if "Y" in aics_img.dims.order else 1,
+        size_x_px=aics_img.dims.X if "X" in aics_img.dims.order else 1,
+        dtype=aics_img.dtype.name,
+        dimension_order=aics_img.dims.order,
+        channel_names=list(aics_img.channel_names),
+        pixel_size_x=aics_img.physical_pixel_sizes[-1],
+        pixel_size_y=aics_img.physical_pixel_sizes[-2],
+        pixel_size_z=aics_img.physical_pixel_sizes[-3],
+    )
+
+
+def _map_scenes(
+    path: str | Path,
+    func: Callable[[AICSImage, int], _T],
+    max_workers: int | None = None,
+    scene_indices: Sequence[int] | None = None,
+) -> list[_T]:
+    with reader_cache.open(path) as aics_img:
+        if scene_indices is None:
+            scene_indices = range(len(aics_img.scenes))
+        reader = type(aics_img.reader)
+    n_chunks = min(max_workers or os.cpu_count() or 1, len(scene_indices))
+    chunk_size = -(-len(scene_indices) // n_chunks)
+    chunks = [
+        scene_indices[start : start + chunk_size]
+        for start in range(0, len(scene_indices), chunk_size)
+    ]
+
+    def map_chunk(chunk_index: int, scene_indices: Sequence[int]) -> list[_T]:
+        # readers are stateful (current scene), so each chunk needs its own reader
+        aics_img_context: AbstractContextManager[AICSImage]
+        if chunk_index == 0:
+            aics_img_context = reader_cache.open(path)
+        else:
+            aics_img_context = nullcontext(AICSImage(path, reader=reader))
+        with aics_img_context as aics_img:
+            return [func(aics_img, scene_index) for scene_index in scene_indices]
+
+    if len(chunks) == 1:
+        return map_chunk(0, chunks[0])
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        return [
+            result
+            for results in executor.map(map_chunk, range(len(chunks)), chunks)
+            for result in results
+        ]
+
+
+def _read_scene(aics_img: AICSImage, scene_index: int) -> tuple[str, Scene | Exception]:
+    # errors are returned instead of raised, so that the other scenes are still read
+    scene_id = aics_img.scenes[scene_index]
+    try:
+        aics_img.set_scene(scene_index)
+        return scene_id, _get_scene(aics_img)
+    except Exception as e:
+        return scene_id, e
+
+
+def load_images(
+    path: str | Path, max_workers: int | None = None, _base_path: Path | None = None
+) -> Sequence[Image]:
     images = []
     path = Path(path)
     if _base_path is None:
         _base_path = path.parent
         assert _base_path.is_dir()
     try:
-        aics_img = AICSImage(path)
+        scene_results = _map_scenes(path, _read_scene, max_workers=max_workers)
+        scenes = [scene for _, scene in scene_results if isinstance(scene, Scene)]
+        scene_errors: dict[str, Exception] = {
+            scene_id: e for scene_id, e in scene_results if isinstance(e, Exception)
+        }
+        # unreadable scenes are flagged, unless no scene can be read
+        if not scenes:
+            raise next(iter(scene_errors.values()))
         img = Image(
             orig_path=str(path),
             posix_path=str(path.relative_to(_base_path).as_posix()),
-            n_scenes=len(aics_img.scenes),
-            n_timepoints=aics_img.dims.T if "T" in aics_img.dims.order else 1,
-            n_channels=aics_img.dims.C if "C" in aics_img.dims.order else 1,
-            size_z_px=aics_img.dims.Z if "Z" in aics_img.dims.order else 1,
-            size_y_px=aics_img.dims.Y if "Y" in aics_img.dims.order else 1,
-            size_x_px=aics_img.dims.X if "X" in aics_img.dims.order else 1,
-            dtype=aics_img.dtype.name,
-            dimension_order=aics_img.dims.order,
-            channel_names=list(aics_img.channel_names),
-            pixel_size_x=aics_img.physical_pixel_sizes[-1],
-            pixel_size_y=aics_img.physical_pixel_sizes[-2],
-            pixel_size_z=aics_img.physical_pixel_sizes[-3],
+            n_scenes=len(scene_results),
+            n_timepoints=scenes[0].n_timepoints,
+            n_channels=scenes[0].n_channels,
+            size_z_px=scenes[0].size_z_px,
+            size_y_px=scenes[0].size_y_px,
+            size_x_px=scenes[0].size_x_px,
+            dtype=scenes[0].dtype,
+            dimension_order=scenes[0].dimension_order,
+            channel_names=scenes[0].channel_names,
+            pixel_size_x=scenes[0].pixel_size_x,
+            pixel_size_y=scenes[0].pixel_size_y,
+            pixel_size_z=scenes[0].pixel_size_z,
+            scenes=scenes,
+            scene_errors={scene_id: str(e) for scene_id, e in scene_errors.items()},
         )
         images.append(img)
     except UnsupportedFileFormatError:
         if path.is_dir():
             for subpath in sorted(path.iterdir()):
-                images += load_images(subpath, _base_path=_base_path)
+                images += load_images(
+                    subpath, max_workers=max_workers, _base_path=_base_path
+                )
     return images
 
 
@@ -49,58 +268,734 @@ def can_load_images(path: str | Path) -> bool:
     if path.is_dir():
         return True
     try:
-        AICSImage.determine_reader(path)
+        reader_cache.determine_reader(path)
     except UnsupportedFileFormatError:
         return False
     return True
 
 
+def _hash_file(
+    path: str | Path, size: int | None = None, chunk_size: int = 1024 * 1024
+) -> bytes:
+    h = hashlib.blake2b()
+    with open(path, mode="rb") as f:
+        remaining = size
+        while remaining is None or remaining > 0:
+            chunk = f.read(
+                chunk_size if remaining is None else min(chunk_size, remaining)
+            )
+            if not chunk:
+                break
+            h.update(chunk)
+            if remaining is not None:
+                remaining -= len(chunk)
+    return h.digest()
+
+
+def _split_by_digest(
+    groups: list[list[str]],
+    executor: ThreadPoolExecutor,
+    hash_size: int | None = None,
+) -> list[list[str]]:
+    orig_paths = [orig_path for group in groups for orig_path in group]
+    digests = dict(
+        zip(orig_paths, executor.map(partial(_hash_file, size=hash_size), orig_paths))
+    )
+    new_groups = []
+    for group in groups:
+        digest_groups: dict[bytes, list[str]] = {}
+        for orig_path in group:
+            digest_groups.setdefault(digests[orig_path], []).append(orig_path)
+        new_groups += [g for g in digest_groups.values() if len(g) > 1]
+    return new_groups
+
+
+def find_duplicates(
+    images: Sequence[Image],
+    partial_hash_size: int = 64 * 1024,
+    max_workers: int | None = None,
+) -> Deduplication:
+    start_time = time.perf_counter()
+    file_sizes = {
+        orig_path: Path(orig_path).stat().st_size
+        for orig_path in dict.fromkeys(img.orig_path for img in images)
+        if Path(orig_path).is_file()
+    }
+    size_groups: dict[int, list[str]] = {}
+    for orig_path, file_size in file_sizes.items():
+        size_groups.setdefault(file_size, []).append(orig_path)
+    groups = [group for group in size_groups.values() if len(group) > 1]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        groups = _split_by_digest(groups, executor, hash_size=partial_hash_size)
+        # small files have already been hashed in full
+        groups = [
+            group for group in groups if file_sizes[group[0]] <= partial_hash_size
+        ] + _split_by_digest(
+            [group for group in groups if file_sizes[group[0]] > partial_hash_size],
+            executor,
+        )
+    duplicates = {orig_path: group[0] for group in groups for orig_path in group[1:]}
+    n_bytes_total = 0
+    n_bytes_saved = 0
+    seen_orig_paths = set()
+    for img in images:
+        if img.orig_path not in file_sizes:
+            continue
+        n_bytes_total += file_sizes[img.orig_path]
+        if img.orig_path in duplicates or img.orig_path in seen_orig_paths:
+            n_bytes_saved += file_sizes[img.orig_path]
+        seen_orig_paths.add(img.orig_path)
+    return Deduplication(
+        duplicates=duplicates,
+        n_bytes_total=n_bytes_total,
+        n_bytes_saved=n_bytes_saved,
+        hashing_time=time.perf_counter() - start_time,
+    )
+
+
+class _ReadAheadFile:
+    def __init__(
+        self, path: str | Path, buffer_size: int = 1024 * 1024, n_buffers: int = 4
+    ) -> None:
+        self._path = path
+        self._buffer_size = buffer_size
+        self._buffers: queue.Queue[bytes | Exception | None] = queue.Queue(
+            maxsize=n_buffers
+        )
+        self._buffer = b""
+        self._eof = False
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._read_ahead, daemon=True)
+        self._thread.start()
+
+    def read(self, size: int = -1) -> bytes:
+        data = bytearray()
+        while size < 0 or len(data) < size:
+            if not self._buffer:
+                if self._eof:
+                    break
+                item = self._buffers.get()
+                if isinstance(item, Exception):
+                    raise item
+                if item is None:
+                    self._eof = True
+                    break
+                if not data and len(item) == size:
+                    return item
+                self._buffer = item
+            n = len(self._buffer) if size < 0 else size - len(data)
+            data += self._buffer[:n]
+            self._buffer = self._buffer[n:]
+        return bytes(data)
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+
+    def _read_ahead(self) -> None:
+        # always terminate the stream, such that read() never blocks indefinitely
+        item: Exception | None = OSError(f"Failed to read {self._path}")
+        try:
+            with open(self._path, mode="rb") as f:
+                while buffer := f.read(self._buffer_size):
+                    if not self._put(buffer):
+                        return
+            item = None
+        except Exception as e:
+            item = e
+        finally:
+            self._put(item)
+
+    def _put(self, item: bytes | Exception | None) -> bool:
+        while not self._closed.is_set():
+            try:
+                self._buffers.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, count: int) -> None:
+    offset = 0
+    use_copy_file_range = hasattr(os, "copy_file_range")
+    while offset < count:
+        n = min(count - offset, 1024**3)
+        if use_copy_file_range:
+            try:
+                n = os.copy_file_range(src_fd, dst_fd, n, offset_src=offset)
+            except OSError as e:
+                if e.errno not in (
+                    errno.EXDEV,
+                    errno.ENOSYS,
+                    errno.EINVAL,
+                    errno.EOPNOTSUPP,
+                ):
+                    raise
+                use_copy_file_range = False
+                continue
+        else:
+            n = os.sendfile(dst_fd, src_fd, offset, n)
+        if n == 0:
+            raise OSError("unexpected end of data")
+        offset += n
+
+
+class _ChecksumFile:
+    def __init__(self, fileobj: BinaryIO | _ReadAheadFile) -> None:
+        self._fileobj = fileobj
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._fileobj.read(size)
+        self._hash.update(data)
+        return data
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+
+def _kernel_copy_file(tar_file: TarFile, tar_info: TarInfo, path: str | Path) -> bool:
+    # bypasses tarfile to copy the data without passing through user space; this
+    # relies on the undocumented TarFile.fileobj (the output file, a BufferedWriter
+    # for uncompressed archives) and TarFile.offset (the end of the last member)
+    output_file = tar_file.fileobj  # type: ignore[attr-defined]
+    if not isinstance(output_file, BufferedWriter):
+        return False
+    buf = tar_info.tobuf(tar_file.format, tar_file.encoding, tar_file.errors)
+    output_file.write(buf)
+    output_file.flush()
+    with open(path, mode="rb") as f:
+        _copy_file_range(f.fileno(), output_file.fileno(), tar_info.size)
+    blocks, remainder = divmod(tar_info.size, tarfile.BLOCKSIZE)
+    if remainder > 0:
+        output_file.write(tarfile.NUL * (tarfile.BLOCKSIZE - remainder))
+        blocks += 1
+    tar_file.offset += len(buf) + blocks * tarfile.BLOCKSIZE  # type: ignore[attr-defined]
+    # in write mode, getmembers returns the member list itself
+    tar_file.getmembers().append(tar_info)
+    return True
+
+
+def _add_file(
+    tar_file: TarFile,
+    path: str | Path,
+    arcname: str,
+    fileobj: _ReadAheadFile | None = None,
+    checksum: bool = True,
+) -> tuple[int, str | None]:
+    if not Path(path).is_file():
+        n_members = len(tar_file.getmembers())
+        tar_file.add(path, arcname=arcname)
+        return sum(m.size for m in tar_file.getmembers()[n_members:]), None
+    tar_info = tar_file.gettarinfo(path, arcname=arcname)
+    if (
+        fileobj is None
+        and not checksum
+        and _KERNEL_COPY
+        and _kernel_copy_file(tar_file, tar_info, path)
+    ):
+        return tar_info.size, None
+    with open(path, mode="rb") if fileobj is None else nullcontext(fileobj) as f:
+        if checksum:
+            checksum_file = _ChecksumFile(f)
+            tar_file.addfile(tar_info, fileobj=checksum_file)
+            return tar_info.size, checksum_file.hexdigest()
+        tar_file.addfile(tar_info, fileobj=f)
+        return tar_info.size, None
+
+
+class _CSVManifestWriter:
+    def __init__(self, path: str | Path) -> None:
+        self._file = open(path, mode="w", newline="")
+        self._writer: csv.DictWriter | None = None
+
+    def write(self, row: dict[str, Any]) -> None:
+        if self._writer is None:
+            self._writer = csv.DictWriter(
+                self._file, fieldnames=list(row), lineterminator=os.linesep
+            )
+            self._writer.writeheader()
+        self._writer.writerow({**row, "channel_names": ",".join(row["channel_names"])})
+        # flush every row, such that metadata is not lost if archiving fails
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _ParquetManifestWriter:
+    def __init__(self, path: str | Path, row_group_size: int = 1024) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema(
+            [
+                ("image", pa.string()),
+                ("scene", pa.string()),
+                ("dtype", pa.string()),
+                ("n_scenes", pa.int64()),
+                ("n_timepoints", pa.int64()),
+                ("n_channels", pa.int64()),
+                ("size_z_px", pa.int64()),
+                ("size_y_px", pa.int64()),
+                ("size_x_px", pa.int64()),
+                ("dimension_order", pa.string()),
+                ("pixel_size_x", pa.float64()),
+                ("pixel_size_y", pa.float64()),
+                ("pixel_size_z", pa.float64()),
+                ("channel_names", pa.list_(pa.string())),
+                ("duplicate_of", pa.string()),
+                ("size_bytes", pa.int64()),
+                ("sha256", pa.string()),
+                ("conversion_time", pa.float64()),
+                ("archive_time", pa.float64()),
+            ]
+        )
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._row_group_size = row_group_size
+        self._rows: list[dict[str, Any]] = []
+
+    def write(self, row: dict[str, Any]) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self._row_group_size:
+            self._write_row_group()
+
+    def close(self) -> None:
+        if self._rows:
+            self._write_row_group()
+        self._writer.close()
+
+    def _write_row_group(self) -> None:
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+        self._writer.write_table(table)
+        self._rows.clear()
+
+
+_MANIFEST_WRITERS = {"csv": _CSVManifestWriter, "parquet": _ParquetManifestWriter}
+
+
+def is_manifest_format_available(manifest_format: str) -> bool:
+    if manifest_format == "parquet":
+        return importlib.util.find_spec("pyarrow") is not None
+    return manifest_format in _MANIFEST_WRITERS
+
+
+def _get_arcnames(img: Image, ome_tiff: bool, split_scenes: bool) -> list[str]:
+    if not ome_tiff:
+        return [img.posix_path]
+    posix_path = PurePosixPath(img.posix_path)
+    if split_scenes and img.n_scenes > 1:
+        width = len(str(img.n_scenes - 1))
+        return [
+            str(posix_path.with_suffix("") / f"scene_{scene_index:0{width}d}.tiff")
+            for scene_index in range(img.n_scenes)
+        ]
+    return [str(posix_path.with_suffix(".tiff"))]
+
+
+def _find_conflicting_arcnames(arcnames: Iterable[str]) -> set[PurePosixPath]:
+    # archive members must be unique and must not be nested in other members
+    members: set[PurePosixPath] = set()
+    parents: set[PurePosixPath] = set()
+    conflicting_members: set[PurePosixPath] = set()
+    for arcname in arcnames:
+        member = PurePosixPath(arcname)
+        if member in members or member in parents:
+            conflicting_members.add(member)
+        conflicting_members.update(members.intersection(member.parents))
+        members.add(member)
+        parents.update(member.parents)
+    return conflicting_members
+
+
+def has_unique_arcnames(
+    images: Sequence[Image], ome_tiff: bool = False, split_scenes: bool = True
+) -> bool:
+    arcnames = (
+        arcname
+        for img in images
+        for arcname in _get_arcnames(img, ome_tiff, split_scenes)
+    )
+    return not _find_conflicting_arcnames(arcnames)
+
+
+def find_conflicting_images(
+    images: Sequence[Image], ome_tiff: bool = False, split_scenes: bool = True
+) -> list[Image]:
+    members = [
+        [
+            PurePosixPath(arcname)
+            for arcname in _get_arcnames(img, ome_tiff, split_scenes)
+        ]
+        for img in images
+    ]
+    conflicting_members = _find_conflicting_arcnames(
+        str(member) for img_members in members for member in img_members
+    )
+    # images nested in a conflicting member are conflicting as well
+    return [
+        img
+        for img, img_members in zip(images, members)
+        if any(
+            member in conflicting_members
+            or not conflicting_members.isdisjoint(member.parents)
+            for member in img_members
+        )
+    ]
+
+
+def _get_n_scene_workers(
+    img: Image, split_scenes: bool, max_workers: int | None = None
+) -> int:
+    if split_scenes and img.n_scenes > 1:
+        return min(max_workers or os.cpu_count() or 1, img.n_scenes)
+    return 1
+
+
+def _convert_scene(
+    aics_img: AICSImage, scene_index: int, temp_dir: str | Path
+) -> tuple[Path, float]:
+    start_time = time.perf_counter()
+    img_file = Path(temp_dir) / f"scene_{scene_index}.tiff"
+    aics_img.save(img_file, select_scenes=[aics_img.scenes[scene_index]])
+    return img_file, time.perf_counter() - start_time
+
+
 def write_archive(
     archive_file: str | Path,
     images: Sequence[Image],
     ome_tiff: bool = False,
     compresslevel: int = 5,
+    duplicates: Mapping[str, str] | None = None,
+    read_ahead: int = 4,
+    read_ahead_buffers: int = 4,
+    buffer_size: int = 1024 * 1024,
+    manifest_formats: Sequence[str] = ("csv",),
+    checksums: bool = True,
+    keep_manifest: bool = False,
+    split_scenes: bool = True,
+    max_workers: int | None = None,
 ) -> Generator[Image, None, None]:
-    with tarfile.open(
-        archive_file, mode="w:gz", compresslevel=compresslevel
-    ) as tar_file:
-        for img in images:
+    for manifest_format in manifest_formats:
+        if manifest_format not in _MANIFEST_WRITERS:
+            raise ValueError(f"Unsupported manifest format: {manifest_format}")
+        if not is_manifest_format_available(manifest_format):
+            raise ImportError(f"Manifest format {manifest_format} requires pyarrow")
+    orig_arcnames: dict[str, list[str]] = {}
+    arcnames: list[list[str]] = []
+    linknames: list[list[str] | None] = []
+    for img in images:
+        img_arcnames = _get_arcnames(img, ome_tiff, split_scenes)
+        orig_path = img.orig_path
+        if duplicates is not None:
+            orig_path = duplicates.get(orig_path, orig_path)
+        if (
+            duplicates is not None
+            and orig_path in orig_arcnames
+            and Path(orig_path).is_file()
+        ):
+            linknames.append(orig_arcnames[orig_path])
+        else:
+            orig_arcnames[orig_path] = img_arcnames
+            linknames.append(None)
+        arcnames.append(img_arcnames)
+    conflicting_arcnames = _find_conflicting_arcnames(
+        [arcname for img_arcnames in arcnames for arcname in img_arcnames]
+        + [f"images.{manifest_format}" for manifest_format in manifest_formats]
+    )
+    if conflicting_arcnames:
+        raise ValueError(
+            "Conflicting archive members: "
+            + ", ".join(sorted(str(arcname) for arcname in conflicting_arcnames))
+        )
+    pending = deque(
+        i
+        for i, (img, img_linknames) in enumerate(zip(images, linknames))
+        if img_linknames is None and Path(img.orig_path).is_file()
+    )
+    if ome_tiff or (compresslevel == 0 and not checksums and _KERNEL_COPY):
+        # converted images are read by aicsimageio; kernel copies do their own
+        # read-ahead
+        pending.clear()
+    read_ahead_files: dict[int, _ReadAheadFile] = {}
+    # manifests are streamed next to the archive and added to it once complete
+    manifest_files = {
+        manifest_format: Path(f"{archive_file}.images.{manifest_format}")
+        for manifest_format in manifest_formats
+    }
+    if compresslevel > 0:
+        tar_file = tarfile.open(
+            archive_file,
+            mode="w:gz",
+            compresslevel=compresslevel,
+            copybufsize=buffer_size,
+        )
+    else:
+        tar_file = tarfile.open(archive_file, mode="w", copybufsize=buffer_size)
+    with tar_file, ExitStack() as manifest_writers_stack:
+        manifest_writers = [
+            manifest_writers_stack.enter_context(
+                closing(_MANIFEST_WRITERS[manifest_format](manifest_file))
+            )
+            for manifest_format, manifest_file in manifest_files.items()
+        ]
+        members: dict[str, tuple[int, str | None]] = {}
+        try:
+            for i, (img, img_arcnames, img_linknames) in enumerate(
+                zip(images, arcnames, linknames)
+            ):
+                while pending and len(read_ahead_files) < read_ahead:
+                    j = pending.popleft()
+                    read_ahead_files[j] = _ReadAheadFile(
+                        images[j].orig_path,
+                        buffer_size=buffer_size,
+                        n_buffers=read_ahead_buffers,
+                    )
+                conversion_times: list[float | None] = [None] * len(img_arcnames)
+                archive_times: list[float] = []
+                if img_linknames is not None:
+                    for arcname, linkname in zip(img_arcnames, img_linknames):
+                        start_time = time.perf_counter()
+                        tar_info = TarInfo(name=arcname)
+                        tar_info.type = tarfile.LNKTYPE
+                        tar_info.linkname = linkname
+                        tar_info.mtime = int(time.time())
+                        tar_file.addfile(tar_info)
+                        members[arcname] = members[linkname]
+                        archive_times.append(time.perf_counter() - start_time)
+                elif ome_tiff:
+                    with TemporaryDirectory() as temp_dir:
+                        if len(img_arcnames) > 1:
+                            conversions = _map_scenes(
+                                img.orig_path,
+                                partial(_convert_scene, temp_dir=temp_dir),
+                                max_workers=max_workers,
+                            )
+                            img_files = [img_file for img_file, _ in conversions]
+                            conversion_times = [t for _, t in conversions]
+                        else:
+                            start_time = time.perf_counter()
+                            img_file = (
+                                Path(temp_dir) / f"{Path(img.orig_path).stem}.tiff"
+                            )
+                            with reader_cache.open(img.orig_path) as aics_img:
+                                aics_img.save(img_file)
+                            img_files = [img_file]
+                            conversion_times = [time.perf_counter() - start_time]
+                        for img_file, arcname in zip(img_files, img_arcnames):
+                            start_time = time.perf_counter()
+                            members[arcname] = _add_file(
+                                tar_file, img_file, arcname, checksum=checksums
+                            )
+                            archive_times.append(time.perf_counter() - start_time)
+                else:
+                    (arcname,) = img_arcnames
+                    start_time = time.perf_counter()
+                    read_ahead_file = read_ahead_files.pop(i, None)
+                    try:
+                        members[arcname] = _add_file(
+                            tar_file,
+                            img.orig_path,
+                            arcname,
+                            fileobj=read_ahead_file,
+                            checksum=checksums,
+                        )
+                    finally:
+                        if read_ahead_file is not None:
+                            read_ahead_file.close()
+                    archive_times.append(time.perf_counter() - start_time)
+                for scene_index, arcname in enumerate(img_arcnames):
+                    metadata: ImageMetadata = img
+                    scene_id = None
+                    if len(img_arcnames) > 1:
+                        if len(img.scenes) == img.n_scenes:
+                            metadata = img.scenes[scene_index]
+                            scene_id = img.scenes[scene_index].scene_id
+                        else:
+                            scene_id = str(scene_index)
+                    size, checksum = members[arcname]
+                    row = {
+                        "image": arcname,
+                        "scene": scene_id,
+                        "dtype": metadata.dtype,
+                        "n_scenes": img.n_scenes,
+                        "n_timepoints": metadata.n_timepoints,
+                        "n_channels": metadata.n_channels,
+                        "size_z_px": metadata.size_z_px,
+                        "size_y_px": metadata.size_y_px,
+                        "size_x_px": metadata.size_x_px,
+                        "dimension_order": metadata.dimension_order,
+                        "pixel_size_x": metadata.pixel_size_x,
+                        "pixel_size_y": metadata.pixel_size_y,
+                        "pixel_size_z": metadata.pixel_size_z,
+                        "channel_names": metadata.channel_names,
+                        "duplicate_of": (
+                            img_linknames[scene_index]
+                            if img_linknames is not None
+                            else None
+                        ),
+                        "size_bytes": size,
+                        "sha256": checksum,
+                        "conversion_time": conversion_times[scene_index],
+                        "archive_time": archive_times[scene_index],
+                    }
+                    for manifest_writer in manifest_writers:
+                        manifest_writer.write(row)
+                yield img
+        finally:
+            for read_ahead_file in read_ahead_files.values():
+                read_ahead_file.close()
+        manifest_writers_stack.close()
+        for manifest_format, manifest_file in manifest_files.items():
+            _add_file(
+                tar_file,
+                manifest_file,
+                f"images.{manifest_format}",
+                checksum=False,
+            )
+    if not keep_manifest:
+        for manifest_file in manifest_files.values():
+            manifest_file.unlink()
+
+
+def _iter_files(path: str | Path) -> Generator[Path, None, None]:
+    path = Path(path)
+    if path.is_file():
+        yield path
+    elif path.is_dir():
+        yield from sorted(subpath for subpath in path.rglob("*") if subpath.is_file())
+
+
+def _read_sample(
+    path: str | Path, sample_size: int, buffer_size: int = 1024 * 1024
+) -> list[bytes]:
+    chunks = []
+    n_bytes = 0
+    for file in _iter_files(path):
+        with open(file, mode="rb") as f:
+            while n_bytes < sample_size and (
+                chunk := f.read(min(buffer_size, sample_size - n_bytes))
+            ):
+                chunks.append(chunk)
+                n_bytes += len(chunk)
+        if n_bytes >= sample_size:
+            break
+    return chunks
+
+
+def _compress_sample(
+    chunks: Sequence[bytes], compresslevel: int, checksum: bool = True
+) -> int:
+    if checksum:
+        checksum_hash = hashlib.sha256()
+        for chunk in chunks:
+            checksum_hash.update(chunk)
+    if compresslevel == 0:
+        return sum(len(chunk) for chunk in chunks)
+    compressor = zlib.compressobj(compresslevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    n_bytes = sum(len(compressor.compress(chunk)) for chunk in chunks)
+    return n_bytes + len(compressor.flush())
+
+
+def estimate_archive(
+    images: Sequence[Image],
+    archive_file: str | Path | None = None,
+    ome_tiff: bool = False,
+    compresslevel: int = 5,
+    checksums: bool = True,
+    split_scenes: bool = True,
+    max_workers: int | None = None,
+    n_samples: int = 5,
+    sample_size: int = 16 * 1024 * 1024,
+    seed: int = 0,
+) -> ArchiveEstimate:
+    input_sizes = {
+        orig_path: sum(file.stat().st_size for file in _iter_files(orig_path))
+        for orig_path in dict.fromkeys(img.orig_path for img in images)
+    }
+    sample_images = {img.orig_path: img for img in reversed(images)}
+    samples = random.Random(seed).sample(
+        list(input_sizes), min(n_samples, len(input_sizes))
+    )
+    n_bytes_read = n_bytes_compressed = n_bytes_converted = 0
+    read_time = compression_time = conversion_time = 0.0
+    n_bytes_conversion_input = 0.0
+    for orig_path in samples:
+        with TemporaryDirectory() as temp_dir:
             if ome_tiff:
-                aics_img = AICSImage(img.orig_path)
-                with TemporaryDirectory() as temp_dir:
-                    img_file = Path(temp_dir) / f"{Path(img.orig_path).stem}.tiff"
-                    posix_path = str(Path(img.posix_path).with_suffix(".tiff"))
-                    aics_img.save(img_file)
-                    tar_file.add(img_file, arcname=posix_path)
+                # only the first scene is converted, assuming equally sized scenes;
+                # the speedup of parallel scene conversion is modelled below
+                img = sample_images[orig_path]
+                ((img_file, scene_conversion_time),) = _map_scenes(
+                    orig_path,
+                    partial(_convert_scene, temp_dir=temp_dir),
+                    scene_indices=[0],
+                )
+                conversion_time += scene_conversion_time
+                n_bytes_conversion_input += input_sizes[orig_path] / img.n_scenes
+                n_bytes_converted += img_file.stat().st_size
+                sample_path: str | Path = temp_dir
             else:
-                tar_file.add(img.orig_path, arcname=img.posix_path)
-            yield img
-        df = pd.DataFrame(
-            data=[
-                {
-                    "image": (
-                        img.posix_path
-                        if not ome_tiff
-                        else str(Path(img.posix_path).with_suffix(".tiff"))
-                    ),
-                    "dtype": img.dtype,
-                    "n_scenes": img.n_scenes,
-                    "n_timepoints": img.n_timepoints,
-                    "n_channels": img.n_channels,
-                    "size_z_px": img.size_z_px,
-                    "size_y_px": img.size_y_px,
-                    "size_x_px": img.size_x_px,
-                    "dimension_order": img.dimension_order,
-                    "pixel_size_x": img.pixel_size_x,
-                    "pixel_size_y": img.pixel_size_y,
-                    "pixel_size_z": img.pixel_size_z,
-                    "channel_names": ",".join(img.channel_names),
-                }
-                for img in images
-            ]
+                sample_path = orig_path
+            start_time = time.perf_counter()
+            chunks = _read_sample(sample_path, sample_size)
+            read_time += time.perf_counter() - start_time
+            start_time = time.perf_counter()
+            n_bytes_compressed += _compress_sample(
+                chunks, compresslevel, checksum=checksums
+            )
+            compression_time += time.perf_counter() - start_time
+            n_bytes_read += sum(len(chunk) for chunk in chunks)
+    n_bytes_input = sum(input_sizes.get(img.orig_path, 0) for img in images)
+    compression_ratio = n_bytes_compressed / n_bytes_read if n_bytes_read > 0 else 1.0
+    compression_time_per_byte = (
+        compression_time / n_bytes_read if n_bytes_read > 0 else 0.0
+    )
+    if ome_tiff:
+        # conversion and compression of the converted images are not overlapped
+        conversion_ratio = (
+            n_bytes_converted / n_bytes_conversion_input
+            if n_bytes_conversion_input > 0
+            else 1.0
+        )
+        conversion_time_per_byte = (
+            conversion_time / n_bytes_conversion_input
+            if n_bytes_conversion_input > 0
+            else 0.0
+        )
+        n_bytes_output = n_bytes_input * conversion_ratio * compression_ratio
+        # scenes of multi-scene images are converted in parallel
+        duration = sum(
+            input_sizes.get(img.orig_path, 0)
+            * (
+                conversion_time_per_byte
+                / _get_n_scene_workers(img, split_scenes, max_workers)
+                + conversion_ratio * compression_time_per_byte
+            )
+            for img in images
+        )
+        read_throughput = None
+        conversion_throughput = (
+            n_bytes_conversion_input / conversion_time if conversion_time > 0 else None
         )
-        data = df.to_csv(index=False).encode()
-        with BytesIO(data) as buf:
-            tar_info = TarInfo(name="images.csv")
-            tar_info.size = len(data)
-            tar_file.addfile(tar_info, fileobj=buf)
+    else:
+        # reading is overlapped with compression by reading ahead
+        read_time_per_byte = read_time / n_bytes_read if n_bytes_read > 0 else 0.0
+        n_bytes_output = n_bytes_input * compression_ratio
+        duration = n_bytes_input * max(read_time_per_byte, compression_time_per_byte)
+        read_throughput = n_bytes_read / read_time if read_time > 0 else None
+        conversion_throughput = None
+    n_bytes_free = None
+    if archive_file is not None:
+        n_bytes_free = shutil.disk_usage(Path(archive_file).absolute().parent).free
+    return ArchiveEstimate(
+        n_bytes_input=n_bytes_input,
+        n_bytes_output=round(n_bytes_output),
+        duration=duration,
+        compression_ratio=compression_ratio,
+        read_throughput=read_throughput,
+        conversion_throughput=conversion_throughput,
+        n_bytes_free=n_bytes_free,
+    )
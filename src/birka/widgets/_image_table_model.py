@@ -13,6 +13,7 @@ from qtpy.QtCore import (  # type: ignore
 from qtpy.QtGui import QColor
 
 from ..models import Image
+from ..utils import find_conflicting_images
 from ._consensus_image_list import ConsensusImageList
 
 
@@ -29,6 +30,8 @@ class ImageTableModel(QAbstractTableModel):
         super().__init__(parent)
         self._images = images
         self._posix_path_pattern: Pattern[str] | None = None
+        self._split_scenes = True
+        self._conflicting_posix_paths: tuple[Any, set[str]] | None = None
         self._posix_path_column = ImageTableModel.Column(
             header="Image",
             selector=lambda img: img.posix_path,
@@ -38,11 +41,7 @@ class ImageTableModel(QAbstractTableModel):
                     if self._posix_path_pattern is not None
                     else True
                 )
-                and not any(
-                    other_img.posix_path == img.posix_path
-                    for other_img in images
-                    if other_img is not img
-                )
+                and img.posix_path not in self._get_conflicting_posix_paths()
             ),
         )
         self._columns = [
@@ -55,6 +54,7 @@ class ImageTableModel(QAbstractTableModel):
             ImageTableModel.Column(
                 header="Scenes",
                 selector=lambda img: img.n_scenes,
+                validator=lambda img: img.has_consistent_scenes,
             ),
             ImageTableModel.Column(
                 header="Timepoints",
@@ -197,6 +197,34 @@ class ImageTableModel(QAbstractTableModel):
             flags |= Qt.ItemFlag.ItemIsEditable
         return flags
 
+    def set_split_scenes(self, split_scenes: bool) -> None:
+        self._split_scenes = split_scenes
+        posix_path_col = self._columns.index(self._posix_path_column)
+        self.dataChanged.emit(
+            self.index(0, posix_path_col),
+            self.index(self.rowCount() - 1, posix_path_col),
+        )
+
+    def _get_conflicting_posix_paths(self) -> set[str]:
+        # archive member names depend on the image paths and numbers of scenes only
+        key = (
+            self._split_scenes,
+            tuple((img.posix_path, img.n_scenes) for img in self._images),
+        )
+        if (
+            self._conflicting_posix_paths is None
+            or self._conflicting_posix_paths[0] != key
+        ):
+            conflicting_posix_paths = {
+                img.posix_path
+                for ome_tiff in (False, True)
+                for img in find_conflicting_images(
+                    self._images, ome_tiff=ome_tiff, split_scenes=self._split_scenes
+                )
+            }
+            self._conflicting_posix_paths = (key, conflicting_posix_paths)
+        return self._conflicting_posix_paths[1]
+
     def set_posix_path_pattern(self, pattern: Pattern[str] | None) -> None:
         self._posix_path_pattern = pattern
         posix_path_col = self._columns.index(self._posix_path_column)